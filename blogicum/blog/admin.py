@@ -4,6 +4,17 @@ from .models import Category, Location, Post
 
 admin.site.empty_value_display = 'Не задано'
 
-admin.site.register(Post)
 admin.site.register(Category)
 admin.site.register(Location)
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    """Админ-панель публикаций."""
+
+    list_display = ('title', 'author', 'pub_date', 'is_published')
+    list_filter = ('is_published', 'category')
+    list_select_related = ('author',)
+    list_per_page = 50
+    raw_id_fields = ('author',)
+    date_hierarchy = 'pub_date'
@@ -8,11 +8,20 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
 
-        exclude = (
-            "author",
-            "is_published",
+        fields = (
+            "title",
+            "text",
+            "pub_date",
+            "location",
+            "category",
+            "image",
         )
-        widgets = {"pub_date": forms.DateInput(attrs={"type": "date"})}
+        widgets = {
+            "pub_date": forms.DateTimeInput(
+                format="%Y-%m-%dT%H:%M",
+                attrs={"type": "datetime-local"},
+            )
+        }
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-15 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_pubdate_id_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_cat_pubdate',
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['is_published'], name='category_published'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'is_published', '-pub_date'], name='post_cat_pub_pubdate'),
+        ),
+    ]
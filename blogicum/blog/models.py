@@ -1,10 +1,25 @@
+from typing import Iterator
+
 from django.db import models
+from django.db.models.functions import Now
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    """Набор публикаций с фильтром видимости для читателей."""
+
+    def published(self) -> "PostQuerySet":
+        """Опубликованные публикации, дата которых уже наступила.
+
+        Время сравнивается на стороне БД через `Now()`; условие совпадает
+        с частичным индексом `post_visible`.
+        """
+        return self.filter(is_published=True, pub_date__lte=Now())
+
+
 class PublishedModel(models.Model):
     """Абстрактная модель. Добвляет флаги is_published, created_at"""
 
@@ -60,9 +75,28 @@ class Post(PublishedModel):
         blank=True,
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = "публикация"
         verbose_name_plural = "Публикации"
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date"], name="post_author_pubdate"
+            ),
+            models.Index(
+                fields=["category", "is_published", "-pub_date"],
+                name="post_cat_pub_pubdate",
+            ),
+            models.Index(
+                fields=["-pub_date"],
+                name="post_visible",
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pubdate_id_desc"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'"{self.title}" от {self.pub_date}'
@@ -71,10 +105,17 @@ class Post(PublishedModel):
         '''Метод возвращающий URL объекта.'''
         return reverse("blog:post_detail", kwargs={"pk": self.pk})
 
-    @property
-    def comment_count(self):
-        '''Декоратор подсчета комментариев.'''
-        return Comment.objects.filter(post_id=self.pk).count()
+    @classmethod
+    def stream_all(cls, chunk_size: int = 2000) -> Iterator["Post"]:
+        """Потоково перебирает все публикации пачками по `chunk_size`.
+
+        Результаты не кешируются в QuerySet, поэтому память не растёт
+        с размером таблицы. Не добавляйте сюда `prefetch_related`:
+        в Django 3.2 он игнорируется при `iterator()`.
+        """
+        return cls.objects.select_related(
+            "location", "category", "author"
+        ).iterator(chunk_size=chunk_size)
 
 
 class Category(PublishedModel):
@@ -93,6 +134,9 @@ class Category(PublishedModel):
     class Meta:
         verbose_name = "категория"
         verbose_name_plural = "Категории"
+        indexes = [
+            models.Index(fields=["is_published"], name="category_published"),
+        ]
 
     def __str__(self):
         return self.title
@@ -135,7 +179,12 @@ class Comment(PublishedModel):
 
     class Meta:
         ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=["post", "is_published"], name="comment_post_published"
+            ),
+        ]
 
     def get_absolute_url(self):
         """Метод возвращающий URL объекта."""
-        return reverse("blog:post_detail", kwargs={"pk": self.post.pk})
+        return reverse("blog:post_detail", kwargs={"pk": self.post_id})
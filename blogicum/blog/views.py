@@ -1,5 +1,7 @@
+from datetime import datetime
+from hashlib import md5
 from http import HTTPStatus
-from typing import Any, Type, Optional
+from typing import Any, Iterator, Type, Optional
 
 from django.views.generic import (
     CreateView,
@@ -8,11 +10,25 @@ from django.views.generic import (
     ListView,
     UpdateView,
 )
+from cachalot.api import get_last_invalidation
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
 from django.core.paginator import Paginator
+from django.db.models import (
+    Count,
+    Exists,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
-from django.urls import reverse
-from django.http import HttpRequest, HttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.urls import reverse, reverse_lazy
+from django.http import Http404, HttpRequest, HttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 from .forms import PostForm, CommentForm
@@ -22,6 +38,139 @@ from .models import Post, User, Comment, Category
 # Константа для настройки пагинации
 PAGINATE_NUM: int = 10
 
+# URL главной страницы блога, не зависящий от параметров запроса
+INDEX_URL = reverse_lazy("blog:index")
+
+# Наибольший первичный ключ, который принимается из курсора пагинации
+# (верхняя граница BIGINT)
+MAX_CURSOR_PK: int = 2 ** 63 - 1
+
+# Время хранения количества объектов пагинатора в кеше, в секундах
+PAGINATOR_COUNT_CACHE_TIMEOUT: int = 60
+
+# Количество опубликованных комментариев к публикации; коррелированный
+# подзапрос обходится без GROUP BY по ленте и читается по индексу
+# комментариев (post, is_published)
+PUBLISHED_COMMENT_COUNT = Coalesce(
+    Subquery(
+        Comment.objects.filter(post=OuterRef("pk"), is_published=True)
+        .order_by()
+        .values("post")
+        .annotate(count=Count("pk"))
+        .values("count")
+    ),
+    0,
+)
+
+# Категория публикации опубликована; условие для запросов, которым
+# сама категория не нужна, без соединения с её таблицей
+PUBLISHED_CATEGORY_EXISTS = Exists(
+    Category.objects.filter(pk=OuterRef("category_id"), is_published=True)
+)
+
+# Поля публикации, которые выводятся в карточке ленты
+POST_CARD_FIELDS: tuple[str, ...] = (
+    "id",
+    "title",
+    "text",
+    "pub_date",
+    "image",
+    "is_published",
+    "author",
+    "category",
+    "location__name",
+    "location__is_published",
+)
+
+# Поля категории и автора для карточки, если они присоединяются к запросу
+POST_CARD_CATEGORY_FIELDS: tuple[str, ...] = (
+    "category__slug",
+    "category__title",
+    "category__is_published",
+)
+POST_CARD_AUTHOR_FIELDS: tuple[str, ...] = ("author__username",)
+
+# Поля публикации, которые нужны формам редактирования и удаления
+POST_EDIT_FIELDS: tuple[str, ...] = (
+    "id",
+    "author_id",
+    "title",
+    "text",
+    "pub_date",
+    "location_id",
+    "category_id",
+    "image",
+    "is_published",
+)
+
+
+class CountQuerySetPaginator(Paginator):
+    """Пагинатор, считающий объекты по отдельному облегчённому запросу.
+
+    Атрибуты:
+        count_queryset (Optional[QuerySet]): запрос без соединений,
+        аннотаций и сортировки, по которому выполняется `COUNT(*)`.
+        Если не задан, используется стандартный подсчёт.
+    """
+
+    def __init__(
+        self,
+        object_list: Any,
+        per_page: int,
+        count_queryset: Optional[QuerySet] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_queryset = count_queryset
+
+    @property
+    def counted_objects(self) -> Any:
+        """Возвращает запрос или список, по которому считаются объекты."""
+        if self.count_queryset is None:
+            return self.object_list
+        return self.count_queryset
+
+    @cached_property
+    def count(self) -> int:
+        """Возвращает общее количество объектов."""
+        if self.count_queryset is None:
+            return super().count
+        return self.count_queryset.count()
+
+
+class CachingPaginator(CountQuerySetPaginator):
+    """Пагинатор, кеширующий количество объектов.
+
+    Ключ кеша строится по тексту SQL-запроса подсчёта и времени последней
+    инвалидации таблиц публикаций и категорий в cachalot, поэтому запись
+    в эти таблицы сбрасывает сохранённое значение. Запросы с `Now()`
+    cachalot не кеширует сам, поэтому здесь количество хранится
+    не дольше `count_cache_timeout` секунд.
+    """
+
+    count_cache_timeout: int = PAGINATOR_COUNT_CACHE_TIMEOUT
+
+    @cached_property
+    def count(self) -> int:
+        """Возвращает количество объектов из кеша или вычисляет его."""
+        queryset = self.counted_objects
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        try:
+            sql = str(queryset.query)
+        except EmptyResultSet:
+            return 0
+
+        key = "paginator_count:{}:{}".format(
+            md5(sql.encode()).hexdigest(),
+            get_last_invalidation(Post, Category, db_alias=queryset.db),
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
 
 class PublicateLoginRequiredMixin(LoginRequiredMixin):
     """Класс миксина, расширяющий функциональность LoginRequiredMixin.
@@ -56,13 +205,21 @@ class PublicateLoginRequiredMixin(LoginRequiredMixin):
             HttpResponse: Объект ответа Django.
         """
         if self.action != "create":
-            self.object = get_object_or_404(self.model, pk=kwargs["pk"])
-            if request.user != self.object.author:
+            self.object = get_object_or_404(
+                self.get_queryset(), pk=kwargs["pk"]
+            )
+            if request.user.id != self.object.author_id:
                 if self.action == "edit":
-                    return redirect(self.object.get_absolute_url())
+                    return redirect("blog:post_detail", pk=kwargs["pk"])
                 return HttpResponse(status=HTTPStatus.NOT_FOUND)
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset: Optional[QuerySet] = None) -> Any:
+        """Возвращает объект, уже загруженный в `dispatch`, чтобы не
+        выполнять повторный запрос.
+        """
+        return self.object
+
     def get_success_url(self) -> str:
         """Метод для определения URL-адреса перенаправления после успешного
         выполнения действия.
@@ -80,7 +237,7 @@ class PublicateLoginRequiredMixin(LoginRequiredMixin):
             str: URL-адрес для перенаправления.
         """
         if self.action == "delete":
-            return reverse("blog:index")
+            return str(INDEX_URL)
         if self.action == "create":
             return reverse(
                 "blog:profile",
@@ -118,13 +275,19 @@ class PostDetailView(DetailView):
     model: Type[Post] = Post
     fields: str = "all"
     template_name: str = "blog/detail.html"
-    queryset = Post.objects.select_related("location", "category")
+
+    def get_queryset(self) -> QuerySet:
+        """Возвращает публикации вместе с местом, категорией и автором."""
+        return Post.objects.select_related("location", "category", "author")
 
     def dispatch(
         self, request: HttpRequest, *args: Any, **kwargs: Any
     ) -> HttpResponse:
         """Переопределённый метод для проверки прав доступа и детализирования.
 
+        Публикация загружается одним запросом; видимость для посторонних
+        проверяется по уже загруженным полям.
+
         Аргументы:
             request (HttpRequest): входящий HTTP-запрос.
 
@@ -132,21 +295,27 @@ class PostDetailView(DetailView):
             HttpResponse: HTTP-ответ после выполнения проверок
             и детализирования.
         """
-        self.object = get_object_or_404(Post, pk=kwargs["pk"])
-        if self.request.user != self.object.author:
-            get_object_or_404(
-                Post,
-                pk=kwargs["pk"],
-                is_published=True,
-                category__is_published=True,
-                pub_date__lt=timezone.now(),
-            )
+        self.object = get_object_or_404(self.get_queryset(), pk=kwargs["pk"])
+        if request.user.id != self.object.author_id and not (
+            self.object.is_published
+            and self.object.category is not None
+            and self.object.category.is_published
+            and self.object.pub_date < timezone.now()
+        ):
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset: Optional[QuerySet] = None) -> Post:
+        """Возвращает публикацию, уже загруженную в `dispatch`."""
+        return self.object
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         """
-        Переопределённый метод для добавления комментариев к контексту
-        страницы.
+        Переопределённый метод для добавления формы и комментариев
+        к контексту страницы.
+
+        Комментарии выбираются словарями только с выводимыми полями,
+        без создания экземпляров моделей.
 
         Возвращает:
             dict[str, Any]: словарь с подготовленными данными для передачи
@@ -155,8 +324,8 @@ class PostDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         context["form"] = CommentForm()
         context["comments"] = self.object.comments.filter(
-            is_published=True,
-        ).select_related("author")
+            is_published=True
+        ).values("id", "text", "created_at", "author_id", "author__username")
         return context
 
 
@@ -168,17 +337,43 @@ class PostListView(ListView):
     template_name: str = "blog/index.html"
     ordering = "-pub_date"
     paginate_by = PAGINATE_NUM
-    queryset = Post.objects.filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True,
-    ).select_related("location", "category")
+    paginator_class: Type[Paginator] = CachingPaginator
+
+    def get_queryset(self) -> QuerySet:
+        """Возвращает опубликованные на момент запроса публикации."""
+        return (
+            Post.objects.published()
+            .filter(category__is_published=True)
+            .select_related("location", "category", "author")
+            .only(
+                *POST_CARD_FIELDS,
+                *POST_CARD_CATEGORY_FIELDS,
+                *POST_CARD_AUTHOR_FIELDS,
+            )
+            .annotate(comment_count=PUBLISHED_COMMENT_COUNT)
+            .order_by(self.get_ordering())
+        )
+
+    def get_paginator(
+        self, queryset: QuerySet, per_page: int, **kwargs: Any
+    ) -> Paginator:
+        """Возвращает пагинатор, считающий публикации без соединений
+        и аннотаций ленты.
+        """
+        kwargs.setdefault(
+            "count_queryset",
+            Post.objects.published()
+            .filter(PUBLISHED_CATEGORY_EXISTS)
+            .values_list("pk", flat=True),
+        )
+        return super().get_paginator(queryset, per_page, **kwargs)
 
 
 class PostUpdateView(PublicateLoginRequiredMixin, UpdateView):
     """Класс представления изменения публикации."""
 
     model: Type[Post] = Post
+    queryset = Post.objects.only(*POST_EDIT_FIELDS)
     template_name: str = "blog/create.html"
     form_class: Type[PostForm] = PostForm
     action: str = "edit"
@@ -188,8 +383,8 @@ class PostDeleteView(PublicateLoginRequiredMixin, DeleteView):
     """Класс представления удаления публикации."""
 
     model: Type[Post] = Post
+    queryset = Post.objects.only(*POST_EDIT_FIELDS)
     template_name: str = "blog/create.html"
-    form_class: Type[PostForm] = PostForm
     action: str = "delete"
 
 
@@ -205,15 +400,22 @@ class Comment_publicateLoginRequiredMixin(LoginRequiredMixin):
         self, request: HttpRequest, *args: Any, **kwargs: Any
     ) -> HttpResponse:
         """Переопределённый метод для проверки прав доступа
-        и детализирования."""
+        и детализирования. Комментарий автора загружается один раз
+        и сохраняется в `self.object`."""
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
         if self.action != "create":
-            if request.user.is_anonymous:
-                return HttpResponse(status=HTTPStatus.NOT_FOUND)
-            get_object_or_404(
-                self.model, pk=kwargs["pk"], author=request.user
+            self.object = get_object_or_404(
+                self.model.objects.only("id", "text", "post_id"),
+                pk=kwargs["pk"],
+                author_id=request.user.id,
             )
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset: Optional[QuerySet] = None) -> Comment:
+        """Возвращает комментарий, уже загруженный в `dispatch`."""
+        return self.object
+
     def get_success_url(self) -> str:
         """Возвращает URL-адрес для перенаправления после успешной обработки
         формы."""
@@ -224,7 +426,6 @@ class CommentCreateView(Comment_publicateLoginRequiredMixin, CreateView):
     """Представление для создания комментариев. Пользователь должен быть
     аутентифицирован."""
 
-    post_id = None
     model: Type[Comment] = Comment
     form_class: Type[CommentForm] = CommentForm
     template_name: str = "blog/comment.html"
@@ -233,10 +434,15 @@ class CommentCreateView(Comment_publicateLoginRequiredMixin, CreateView):
     def dispatch(
         self, request: HttpRequest, *args: Any, **kwargs: Any
     ) -> HttpResponse:
-        """Переопределённый метод для получения поста, к которому добавляется
-        комментарий.
+        """Переопределённый метод для проверки существования поста, к которому
+        добавляется комментарий. Сам пост не загружается; анонимный
+        пользователь перенаправляется на вход без обращения к БД.
         """
-        self.post_id = get_object_or_404(Post, pk=kwargs["pk"])
+        if (
+            request.user.is_authenticated
+            and not Post.objects.filter(pk=kwargs["pk"]).exists()
+        ):
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form: CommentForm) -> HttpResponse:
@@ -244,7 +450,7 @@ class CommentCreateView(Comment_publicateLoginRequiredMixin, CreateView):
         спользователем и постом.
         """
         form.instance.author = self.request.user
-        form.instance.post = self.post_id
+        form.instance.post_id = self.kwargs["pk"]
         return super().form_valid(form)
 
 
@@ -260,7 +466,6 @@ class CommentDeleteView(Comment_publicateLoginRequiredMixin, DeleteView):
     """Класс представления удаления комментария."""
 
     model: Type[Comment] = Comment
-    fields = ("text",)
     template_name: str = "blog/comment.html"
 
 
@@ -289,24 +494,118 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
         return reverse("blog:profile", kwargs={"slug": self.object.username})
 
 
+class KeysetPage:
+    """Страница курсорной пагинации публикаций по `(pub_date, pk)`.
+
+    Атрибуты:
+        object_list (list): публикации страницы.
+        has_next (bool): есть ли публикации после этой страницы.
+    """
+
+    is_keyset: bool = True
+
+    def __init__(self, object_list: list, has_next: bool) -> None:
+        self.object_list = object_list
+        self.has_next = has_next
+
+    def __iter__(self) -> Iterator[Post]:
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self) -> bool:
+        """Показывать ли навигацию по страницам."""
+        return self.has_next
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        """Курсор следующей страницы по последней публикации текущей."""
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        return f"{last.pub_date.isoformat()}_{last.pk}"
+
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+        """Разбирает курсор вида `<pub_date в ISO 8601>_<pk>`.
+
+        Возвращает `None`, если курсор не задан или некорректен: дата
+        без часового пояса, не переводимая в UTC, или ключ вне диапазона
+        BIGINT.
+        """
+        if not cursor:
+            return None
+        pub_date, _, pk = cursor.rpartition("_")
+        try:
+            parsed_pub_date = parse_datetime(pub_date)
+            parsed_pk = int(pk)
+            if parsed_pub_date is None or timezone.is_naive(parsed_pub_date):
+                return None
+            parsed_pub_date = parsed_pub_date.astimezone(timezone.utc)
+        except (ValueError, OverflowError):
+            return None
+        if not 0 < parsed_pk <= MAX_CURSOR_PK:
+            return None
+        return parsed_pub_date, parsed_pk
+
+
 class PaginatorAddMixin:
-    """Миксин для добавления пагинации к списку связанных объектов."""
+    """Миксин для добавления пагинации к списку связанных объектов.
+
+    Если в запросе передан параметр `keyset_param`, публикации
+    отдаются курсорной страницей без OFFSET, иначе — по номеру страницы.
+    """
 
     paginate_by: int = PAGINATE_NUM
+    paginator_class: Type[Paginator] = CachingPaginator
+    keyset_param: str = "after"
 
     def paginate_list(
-        self, objects_list: list, paginate_by: Optional[int] = None
+        self,
+        objects_list: list,
+        paginate_by: Optional[int] = None,
+        count_queryset: Optional[QuerySet] = None,
     ) -> Paginator:
         """Пагинирует предоставленный список. Количество элементов на странице
         определяется параметром `paginate_by`. Если `paginate_by` не
-        предоставлен, используется `self.paginate_by`.
+        предоставлен, используется `self.paginate_by`. Если передан
+        `count_queryset`, общее количество считается по нему.
         """
         paginate_by = paginate_by or self.paginate_by
-        paginator = Paginator(objects_list, paginate_by)
+        if self.keyset_param in self.request.GET:
+            return self.paginate_keyset(objects_list, paginate_by)
+        paginator = self.paginator_class(
+            objects_list, paginate_by, count_queryset=count_queryset
+        )
         page_number = self.request.GET.get("page")
         page_obj = paginator.get_page(page_number)
         return page_obj
 
+    def paginate_keyset(
+        self, queryset: QuerySet, page_size: Optional[int] = None
+    ) -> KeysetPage:
+        """Возвращает публикации, следующие за курсором из запроса.
+
+        Выборка идёт по индексу `(pub_date, id)` от позиции курсора,
+        поэтому её стоимость не зависит от глубины страницы.
+        """
+        page_size = page_size or self.paginate_by
+        queryset = queryset.order_by("-pub_date", "-pk")
+        cursor = KeysetPage.parse_cursor(
+            self.request.GET.get(self.keyset_param)
+        )
+        if cursor is not None:
+            pub_date, pk = cursor
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        objects = list(queryset[:page_size + 1])
+        return KeysetPage(
+            objects[:page_size], has_next=len(objects) > page_size
+        )
+
 
 class UserDetailView(PaginatorAddMixin, DetailView):
     """Класс представления просмотра профиля пользователя."""
@@ -317,22 +616,38 @@ class UserDetailView(PaginatorAddMixin, DetailView):
     context_object_name: str = "profile"
     template_name: str = "blog/profile.html"
 
+    def get_queryset(self) -> QuerySet:
+        """Возвращает пользователей только с полями, выводимыми в профиле."""
+        return User.objects.only(
+            "id",
+            "username",
+            "first_name",
+            "last_name",
+            "date_joined",
+            "is_staff",
+        )
+
     def get_context_data(self, **kwargs) -> dict:
         """
         Добавляет к контексту посты, связанные с пользователем.
         """
         context = super().get_context_data(**kwargs)
-        posts = self.object.posts.select_related(
-            "location", "category"
-        ).order_by("-pub_date")
-
+        posts = self.object.posts.all()
+        count_posts = posts
         if self.request.user != self.object:
-            posts = posts.filter(
-                is_published=True,
-                category__is_published=True,
-            )
-
-        page_obj = self.paginate_list(posts)
+            posts = posts.published()
+            count_posts = posts.filter(PUBLISHED_CATEGORY_EXISTS)
+            posts = posts.filter(category__is_published=True)
+        page_posts = (
+            posts.select_related("location", "category")
+            .annotate(comment_count=PUBLISHED_COMMENT_COUNT)
+            .only(*POST_CARD_FIELDS, *POST_CARD_CATEGORY_FIELDS)
+            .order_by("-pub_date")
+        )
+        page_obj = self.paginate_list(
+            page_posts,
+            count_queryset=count_posts.values_list("pk", flat=True),
+        )
         context["page_obj"] = page_obj
         return context
 
@@ -344,21 +659,32 @@ class CategoryDetailView(PaginatorAddMixin, DetailView):
     fields = "__all__"
     slug_field: str = "slug"
     template_name: str = "blog/category.html"
-    queryset = Category.objects.filter(is_published=True)
+
+    def get_queryset(self) -> QuerySet:
+        """Возвращает опубликованные категории."""
+        return Category.objects.filter(is_published=True).only(
+            "id", "slug", "title", "description", "is_published"
+        )
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
-        """Добавляет к контексту посты, связанные с категорией."""
+        """Добавляет к контексту посты, связанные с категорией.
+
+        Категория уже проверена на публикацию и подставляется в посты
+        связанным менеджером, поэтому повторно её не присоединяем.
+        """
         context = super().get_context_data(**kwargs)
+        published_posts = self.object.posts.published()
         posts = (
-            self.object.posts.filter(
-                pub_date__lte=timezone.now(),
-                is_published=True,
-                category__is_published=True,
-            )
-            .select_related("location", "category")
+            published_posts.select_related("location", "author")
+            .only(*POST_CARD_FIELDS, *POST_CARD_AUTHOR_FIELDS)
+            .annotate(comment_count=PUBLISHED_COMMENT_COUNT)
             .order_by("-pub_date")
         )
 
-        page_obj = self.paginate_list(posts, PAGINATE_NUM)
+        page_obj = self.paginate_list(
+            posts,
+            PAGINATE_NUM,
+            count_queryset=published_posts.values_list("pk", flat=True),
+        )
         context["page_obj"] = page_obj
         return context
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django_bootstrap5",
+    "cachalot",
 ]
 
 MIDDLEWARE = [
@@ -65,9 +66,26 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Соединение переиспользуется между запросами, чтобы не открывать
+        # его заново на каждой странице ленты.
+        "CONN_MAX_AGE": 600,
     }
 }
 
+# В боевом окружении с несколькими процессами здесь должен быть общий
+# кеш (Redis, Memcached), иначе инвалидация cachalot не дойдёт
+# до соседних воркеров.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+CACHALOT_ENABLED = True
+# Запрос сессии содержит текущее время, поэтому каждый запрос
+# авторизованного пользователя создавал бы новую запись в кеше.
+CACHALOT_UNCACHABLE_TABLES = frozenset(("django_migrations", "django_session"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
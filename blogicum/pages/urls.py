@@ -1,11 +1,29 @@
 from django.urls import path
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_cookie
 
 from . import views
 
 
+# Время кеширования статических страниц, в секундах
+STATIC_PAGE_CACHE_TIMEOUT: int = 60 * 60 * 24
+
 app_name = "pages"
 
+# Шапка страниц зависит от пользователя, поэтому кеш разделяется по cookie.
 urlpatterns = [
-    path("pages/about/", views.About.as_view(), name="about"),
-    path("pages/rules/", views.Rules.as_view(), name="rules"),
+    path(
+        "pages/about/",
+        cache_page(STATIC_PAGE_CACHE_TIMEOUT)(
+            vary_on_cookie(views.About.as_view())
+        ),
+        name="about",
+    ),
+    path(
+        "pages/rules/",
+        cache_page(STATIC_PAGE_CACHE_TIMEOUT)(
+            vary_on_cookie(views.Rules.as_view())
+        ),
+        name="rules",
+    ),
 ]
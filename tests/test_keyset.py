@@ -0,0 +1,89 @@
+import warnings
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+import pytz
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+N_KEYSET_POSTS = N_PER_PAGE * 2 + 3
+
+
+@pytest.fixture
+def keyset_posts(mixer: Mixer, user, published_category):
+    # По две публикации на дату, чтобы порядок внутри даты решал id.
+    pub_dates = (
+        datetime(2020, 1, 1, tzinfo=pytz.UTC) + timedelta(days=i // 2)
+        for i in range(N_KEYSET_POSTS)
+    )
+    return mixer.cycle(N_KEYSET_POSTS).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_dates,
+    )
+
+
+def test_keyset_walks_all_pages(
+    client: Client, keyset_posts, published_category
+):
+    url = f"/category/{published_category.slug}/"
+    expected_ids = [
+        post.id
+        for post in sorted(
+            keyset_posts, key=lambda post: (post.pub_date, post.id),
+            reverse=True,
+        )
+    ]
+
+    seen_ids = []
+    cursor = ""
+    for _ in range(len(expected_ids)):
+        response = client.get(url, {"after": cursor})
+        assert response.status_code == HTTPStatus.OK
+        page_obj = response.context["page_obj"]
+        assert len(page_obj) <= N_PER_PAGE
+        seen_ids.extend(post.id for post in page_obj)
+        cursor = page_obj.next_cursor
+        if cursor is None:
+            break
+
+    assert seen_ids == expected_ids, (
+        "Убедитесь, что переход по курсорам `next_cursor` выводит каждую "
+        "публикацию категории ровно один раз и в порядке убывания даты."
+    )
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "garbage",
+        "_",
+        "2020-13-01T00:00:00+00:00_3",
+        "2020-01-01T00:00:00_3",
+        "2020-01-01T00:00:00+00:00_99999999999999999999999",
+        "2020-01-01T00:00:00+00:00_-1",
+        "2020-01-01T00:00:00+00:00_0",
+        "0001-01-01T00:00:00+01:00_1",
+        "9999-12-31T23:59:59-01:00_1",
+    ],
+)
+def test_keyset_bad_cursor_shows_first_page(
+    client: Client, keyset_posts, published_category, cursor
+):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        response = client.get(
+            f"/category/{published_category.slug}/", {"after": cursor}
+        )
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что некорректный курсор пагинации не приводит "
+        "к ошибке сервера."
+    )
+    assert len(response.context["page_obj"]) == N_PER_PAGE